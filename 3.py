@@ -5,11 +5,17 @@ import time
 import multiprocessing
 import sys
 import logging
-from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from collections import defaultdict
 from openpyxl.utils import get_column_letter
 from datetime import datetime
 from concurrent_log_handler import ConcurrentRotatingFileHandler  # 关键修复
+from parallel_plan import (
+    ExecutionPlan, MODE_SERIAL, MODE_PROCESS, calibrate, load_calibration, read_sheet_stats, plan_sheet_scan
+)
+
+# 校准缓存中区分扫描器的名称
+SCANNER_NAME = '3.parallel_static_data_check'
 
 def setup_logging(log_dir):
     """配置多进程安全的日志系统"""
@@ -44,6 +50,44 @@ def setup_logging(log_dir):
     
     return logger
 
+def find_empty_cells(df):
+    """返回DataFrame中空值/空白字符串单元格的Excel坐标列表"""
+    empty_cells = []
+    
+    # 将空白字符串转换为NaN
+    df = df.replace(r'^\s*$', np.nan, regex=True)
+    
+    # 获取空值位置
+    empty_positions = np.argwhere(df.isnull().values)
+    
+    # 转换位置为Excel坐标
+    for row_idx, col_idx in empty_positions:
+        row_num = row_idx + 1
+        col_letter = get_column_letter(col_idx + 1)
+        cell_ref = f"{col_letter}{row_num}"
+        empty_cells.append(cell_ref)
+    
+    return empty_cells
+
+def measure_sheet_scan(file_path):
+    """
+    校准用：按pandas扫描的方式读取样例工作簿
+    返回 (打开耗时, 解析耗时, 判空耗时)，判空在已读入的DataFrame上计时，不含解析
+    """
+    t0 = time.perf_counter()
+    xl = pd.ExcelFile(file_path, engine='openpyxl')
+    t1 = time.perf_counter()
+    df = xl.parse(sheet_name=0, header=None, dtype=str)
+    t2 = time.perf_counter()
+    xl.close()
+    
+    check_times = []
+    for _ in range(3):
+        t3 = time.perf_counter()
+        find_empty_cells(df)
+        check_times.append(time.perf_counter() - t3)
+    return t1 - t0, t2 - t1, min(check_times)
+
 def scan_sheet_for_empty_cells(args):
     """扫描单个sheet页的空单元格并返回结果"""
     file_path, sheet_name, logger = args
@@ -58,27 +102,18 @@ def scan_sheet_for_empty_cells(args):
             dtype=str,
             engine='openpyxl'
         )
-        
-        # 将空白字符串转换为NaN
-        df = df.replace(r'^\s*$', np.nan, regex=True)
-        
-        # 获取空值位置
-        empty_positions = np.argwhere(df.isnull().values)
-        
-        # 转换位置为Excel坐标
-        for row_idx, col_idx in empty_positions:
-            row_num = row_idx + 1
-            col_letter = get_column_letter(col_idx + 1)
-            cell_ref = f"{col_letter}{row_num}"
-            empty_cells.append(cell_ref)
+        empty_cells = find_empty_cells(df)
             
     except Exception as e:
         logger.error(f"处理工作表 '{sheet_name}' 时出错: {str(e)}")
     
     return sheet_name, empty_cells
 
-def parallel_static_data_check(file_path, logger):
-    """全sheet页并行静态数据检查"""
+def parallel_static_data_check(file_path, logger, max_workers=None):
+    """
+    全sheet页并行静态数据检查
+    按本机校准结果和各工作表规模自动选择串行/多线程/多进程及并发数
+    """
     start_time = time.time()
     empty_cells_dict = defaultdict(list)
     
@@ -92,24 +127,36 @@ def parallel_static_data_check(file_path, logger):
         sheet_names = xl.sheet_names
         xl.close()
         
-        logger.info(f"工作簿包含 {len(sheet_names)} 个工作表，启动并行扫描...")
+        # 根据工作表XML大小、行列数和本机校准结果选择执行方式
+        try:
+            stats = [stat for stat in read_sheet_stats(file_path) if stat['name'] in sheet_names]
+            plan = plan_sheet_scan(stats, load_calibration(SCANNER_NAME), max_workers)
+        except Exception as e:
+            # 规模信息只用于估算，读取失败时改为串行扫描，不影响检查本身
+            logger.warning(f"读取工作表规模信息失败，改为串行扫描: {str(e)}")
+            plan = ExecutionPlan(MODE_SERIAL, 1, 1, None)
+        logger.info(f"工作簿包含 {len(sheet_names)} 个工作表，执行方式: {plan.mode}，并发数: {plan.workers}")
+        if plan.estimated_seconds is not None:
+            logger.info(f"预估耗时: {plan.estimated_seconds:.4f} 秒")
         
-        # 进程池并行处理
-        max_workers = min(multiprocessing.cpu_count(), len(sheet_names))
-        with ProcessPoolExecutor(max_workers=max_workers) as executor:
-            # 提交所有sheet扫描任务
-            futures = {
-                executor.submit(
-                    scan_sheet_for_empty_cells, 
-                    (file_path, name, logger)
-                ): name for name in sheet_names
-            }
-            
-            # 收集结果
-            for future in as_completed(futures):
-                sheet_name, empty_cells = future.result()
-                if empty_cells:
-                    empty_cells_dict[sheet_name] = empty_cells
+        if plan.mode == MODE_SERIAL:
+            results = [scan_sheet_for_empty_cells((file_path, name, logger)) for name in sheet_names]
+        else:
+            executor_cls = ProcessPoolExecutor if plan.mode == MODE_PROCESS else ThreadPoolExecutor
+            with executor_cls(max_workers=plan.workers) as executor:
+                # 提交所有sheet扫描任务
+                futures = {
+                    executor.submit(
+                        scan_sheet_for_empty_cells, 
+                        (file_path, name, logger)
+                    ): name for name in sheet_names
+                }
+                results = [future.result() for future in as_completed(futures)]
+        
+        # 收集结果
+        for sheet_name, empty_cells in results:
+            if empty_cells:
+                empty_cells_dict[sheet_name] = empty_cells
     
     except Exception as e:
         logger.error(f"处理Excel时发生全局错误: {str(e)}")
@@ -144,6 +191,11 @@ if __name__ == "__main__":
     # Windows系统必需设置
     multiprocessing.freeze_support()
     
+    if '--calibrate' in sys.argv:
+        # 显式校准：测量本机进程启动和pandas扫描耗时，结果缓存供自动模式使用
+        print(calibrate(SCANNER_NAME, measure_sheet_scan))
+        sys.exit(0)
+    
     # 文件路径
     file_path = r'C:\Users\wjy17\Desktop\Excel_Scripts\#竞技场神兽配置表战力.xlsx'
     
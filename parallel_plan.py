@@ -0,0 +1,328 @@
+import openpyxl
+import os
+import json
+import math
+import time
+import platform
+import threading
+import multiprocessing
+import posixpath
+import re
+import tempfile
+import zipfile
+import xml.etree.ElementTree as ET
+from collections import namedtuple
+from openpyxl.utils.cell import range_boundaries
+
+# 执行方式
+MODE_SERIAL = 'serial'
+MODE_THREAD = 'thread'
+MODE_PROCESS = 'process'
+
+# 执行计划：执行方式、并发数、每块行数、预估耗时（秒）
+ExecutionPlan = namedtuple('ExecutionPlan', ['mode', 'workers', 'chunk_size', 'estimated_seconds'])
+
+# 校准结果缓存文件（按机器、Python版本、CPU数、进程启动方式和扫描器区分）
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser('~'), '.excel_auto_calibration.json')
+
+# 尚未校准时使用的保守默认值：进程启动代价取大，小工作簿一律串行
+DEFAULT_CALIBRATION = {
+    'process_startup': 1.0,
+    'thread_startup': 0.001,
+    'open_overhead': 0.01,
+    'per_byte': 5e-7,
+    'per_cell': 1e-7,
+    'thread_speedup': 1.0,
+}
+
+_NS_MAIN = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+_NS_REL = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+_NS_PKG_REL = '{http://schemas.openxmlformats.org/package/2006/relationships}'
+_DIMENSION_RE = re.compile(rb'<(?:\w+:)?dimension\s+ref="([^"]+)"')
+
+_calibration_memo = {}
+
+
+def _noop(_):
+    """进程启动测量用的空任务"""
+    return None
+
+
+def _build_sample_workbook(path, rows, cols):
+    """生成校准用的样例工作簿（数字、文本、空白字符串、空单元格和空行混合）"""
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    for r in range(1, rows + 1):
+        if r % 10 == 0:
+            continue  # 空行
+        for c in range(1, cols + 1):
+            k = (r * cols + c) % 5
+            if k == 0:
+                continue
+            if k == 1:
+                value = f"文本{r}_{c}"
+            elif k == 2:
+                value = "  "
+            else:
+                value = r * c
+            sheet.cell(row=r, column=c, value=value)
+    workbook.save(path)
+
+
+def run_calibration(measure, mp_context=None, sample_rows=400, sample_cols=20, tmp_dir=None):
+    """
+    在当前机器上测量某个扫描器的执行代价
+    measure(sample_path) 按该扫描器的实际读取方式处理样例工作簿，
+    返回 (打开耗时, 解析耗时, 判空耗时)，判空耗时应在已读入内存的数据上单独计时
+    结果：
+      - process_startup: 启动一个工作进程并完成一次空任务的耗时
+      - thread_startup:  启动一个线程的耗时
+      - open_overhead:   打开一次工作簿的固定开销
+      - per_byte:        解析工作表XML每字节的耗时
+      - per_cell:        判空逻辑每个单元格的耗时
+      - thread_speedup:  两个线程同时扫描相对单线程的加速比（受GIL限制，1~2）
+    """
+    ctx = mp_context or multiprocessing.get_context()
+    tmp_dir = tmp_dir or tempfile.gettempdir()
+    sample_path = os.path.join(tmp_dir, f".calibration_{os.getpid()}.xlsx")
+
+    try:
+        _build_sample_workbook(sample_path, sample_rows, sample_cols)
+        sample_stat = read_sheet_stats(sample_path)[0]
+        xml_bytes = sample_stat['xml_bytes']
+        cells = sample_rows * sample_cols
+
+        # 预热一次，避免首次导入影响测量
+        measure(sample_path)
+        runs = []
+        for _ in range(3):
+            t0 = time.perf_counter()
+            timings = measure(sample_path)
+            runs.append((time.perf_counter() - t0, timings))
+        single = min(elapsed for elapsed, _ in runs)
+        open_time, parse_time, check_time = min(
+            (timings for _, timings in runs), key=lambda t: sum(t))
+
+        # 两个线程同时扫描，与单线程完整调用一次measure()的墙钟时间对比，测量GIL下的实际加速比
+        threads = [threading.Thread(target=measure, args=(sample_path,)) for _ in range(2)]
+        t0 = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        both = time.perf_counter() - t0
+        thread_speedup = min(2.0, max(1.0, 2 * single / both))
+
+        t0 = time.perf_counter()
+        t = threading.Thread(target=_noop, args=(None,))
+        t.start()
+        t.join()
+        thread_startup = time.perf_counter() - t0
+
+        # 进程启动包含解释器启动和（spawn方式下）主模块重新导入
+        t0 = time.perf_counter()
+        with ctx.Pool(processes=1) as pool:
+            pool.map(_noop, [None])
+        process_startup = time.perf_counter() - t0
+    finally:
+        if os.path.exists(sample_path):
+            os.remove(sample_path)
+
+    # 样例打开耗时包含共享字符串的解析，_costs()会按shared_bytes另行计入，这里扣除
+    per_byte = parse_time / max(xml_bytes, 1)
+    open_overhead = max(open_time - sample_stat['shared_bytes'] * per_byte, 0.0)
+
+    return {
+        'process_startup': process_startup,
+        'thread_startup': thread_startup,
+        'open_overhead': open_overhead,
+        'per_byte': per_byte,
+        'per_cell': check_time / cells,
+        'thread_speedup': thread_speedup,
+    }
+
+
+def _calibration_key(name, ctx):
+    return '|'.join([
+        platform.node(),
+        platform.python_version(),
+        str(multiprocessing.cpu_count()),
+        ctx.get_start_method(),
+        name,
+    ])
+
+
+def _read_cache(cache_path):
+    if not os.path.exists(cache_path):
+        return {}
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def calibrate(name, measure, mp_context=None, cache_path=None):
+    """
+    执行校准并写入缓存（显式步骤，由各脚本的 --calibrate 参数调用）
+    name 区分扫描器：不同脚本的工作负载和spawn时重新导入的模块都不同
+    应在该扫描器所在脚本作为主模块运行时调用，进程启动耗时才包含其导入开销
+    """
+    ctx = mp_context or multiprocessing.get_context()
+    cache_path = cache_path or DEFAULT_CACHE_PATH
+    key = _calibration_key(name, ctx)
+
+    result = run_calibration(measure, ctx)
+    cache = _read_cache(cache_path)
+    cache[key] = result
+    try:
+        with open(cache_path, 'w', encoding='utf-8') as f:
+            json.dump(cache, f, ensure_ascii=False, indent=2)
+    except OSError:
+        pass  # 缓存写入失败不影响本次运行
+
+    _calibration_memo[key] = result
+    return result
+
+
+def load_calibration(name, mp_context=None, cache_path=None):
+    """
+    读取本机该扫描器的校准结果；未校准时返回保守默认值，不在扫描过程中执行校准
+    """
+    ctx = mp_context or multiprocessing.get_context()
+    key = _calibration_key(name, ctx)
+
+    if key not in _calibration_memo:
+        cached = _read_cache(cache_path or DEFAULT_CACHE_PATH).get(key)
+        _calibration_memo[key] = cached or dict(DEFAULT_CALIBRATION)
+    return _calibration_memo[key]
+
+
+def read_sheet_stats(file_path):
+    """
+    不加载工作簿，直接从xlsx压缩包中读取各工作表的规模信息
+    返回列表（按工作表顺序）: [{'name', 'xml_bytes', 'shared_bytes', 'rows', 'cols'}]
+    rows/cols 取自工作表XML中的dimension标记，缺失时为0
+    """
+    stats = []
+    with zipfile.ZipFile(file_path) as archive:
+        names = set(archive.namelist())
+        shared_bytes = 0
+        if 'xl/sharedStrings.xml' in names:
+            shared_bytes = archive.getinfo('xl/sharedStrings.xml').file_size
+
+        # 关系ID -> 工作表XML路径
+        targets = {}
+        rels = ET.fromstring(archive.read('xl/_rels/workbook.xml.rels'))
+        for rel in rels.iter(f'{_NS_PKG_REL}Relationship'):
+            target = rel.get('Target', '')
+            if target.startswith('/'):
+                target = target[1:]
+            else:
+                target = posixpath.normpath(posixpath.join('xl', target))
+            targets[rel.get('Id')] = target
+
+        workbook = ET.fromstring(archive.read('xl/workbook.xml'))
+        for sheet in workbook.iter(f'{_NS_MAIN}sheet'):
+            path = targets.get(sheet.get(f'{_NS_REL}id'))
+            if path not in names:
+                continue  # 图表页等非普通工作表
+
+            rows = cols = 0
+            with archive.open(path) as src:
+                head = src.read(4096)
+            match = _DIMENSION_RE.search(head)
+            if match:
+                try:
+                    min_col, min_row, max_col, max_row = range_boundaries(match.group(1).decode())
+                    if max_row is not None and max_col is not None:
+                        rows = max_row - min_row + 1
+                        cols = max_col - min_col + 1
+                except ValueError:
+                    pass
+
+            stats.append({
+                'name': sheet.get('name'),
+                'xml_bytes': archive.getinfo(path).file_size,
+                'shared_bytes': shared_bytes,
+                'rows': rows,
+                'cols': cols,
+            })
+    return stats
+
+
+def _costs(stat, calibration):
+    """返回 (每个任务的打开开销, 工作表XML解析耗时, 判空耗时)"""
+    open_cost = calibration['open_overhead'] + stat['shared_bytes'] * calibration['per_byte']
+    parse_cost = stat['xml_bytes'] * calibration['per_byte']
+    check_cost = stat['rows'] * stat['cols'] * calibration['per_cell']
+    return open_cost, parse_cost, check_cost
+
+
+def _process_parallelism(workers):
+    """多进程的有效并行度不超过CPU核数（max_workers只决定进程池大小）"""
+    return min(workers, multiprocessing.cpu_count())
+
+
+def _thread_parallelism(workers, calibration):
+    """按两线程实测加速比线性外推多线程的有效并行度"""
+    return min(_process_parallelism(workers),
+               1 + (calibration['thread_speedup'] - 1) * (workers - 1))
+
+
+def _best(candidates):
+    return min(candidates, key=lambda plan: plan.estimated_seconds)
+
+
+def plan_row_chunks(stat, calibration, max_workers=None):
+    """
+    为单个工作表的分块扫描选择执行方式
+    只读模式下每块都要从头解析XML直到该块的最后一行，最后一块必须解析整张表，
+    因此只有判空部分能被分摊；同时每块都要重新打开一次工作簿
+    """
+    rows = max(stat['rows'], 1)
+    open_cost, parse_cost, check_cost = _costs(stat, calibration)
+    serial = open_cost + parse_cost + check_cost
+    candidates = [ExecutionPlan(MODE_SERIAL, 1, rows, serial)]
+
+    limit = min(max_workers or multiprocessing.cpu_count(), rows)
+    for workers in range(2, limit + 1):
+        chunk_size = math.ceil(rows / workers)
+        # 每个工作者处理一块，块数与工作者数相同时重复解析最少
+        per_worker = open_cost + parse_cost + check_cost / _process_parallelism(workers)
+        candidates.append(ExecutionPlan(
+            MODE_PROCESS, workers, chunk_size,
+            calibration['process_startup'] + per_worker))
+
+        # 线程共享GIL：总工作量（含每块重复解析的部分）按有效并行度分摊
+        repeated_parse = parse_cost * (workers + 1) / 2
+        total = open_cost * workers + repeated_parse + check_cost
+        candidates.append(ExecutionPlan(
+            MODE_THREAD, workers, chunk_size,
+            calibration['thread_startup'] * workers
+            + max(per_worker, total / _thread_parallelism(workers, calibration))))
+
+    return _best(candidates)
+
+
+def plan_sheet_scan(stats, calibration, max_workers=None):
+    """
+    为按工作表并行的扫描选择执行方式（每个工作表一个任务，chunk_size 固定为1）
+    并行耗时按 max(最大单表耗时, 总耗时/并发数) 估算
+    """
+    costs = [sum(_costs(stat, calibration)) for stat in stats] or [0.0]
+    total = sum(costs)
+    largest = max(costs)
+    candidates = [ExecutionPlan(MODE_SERIAL, 1, 1, total)]
+
+    limit = min(max_workers or multiprocessing.cpu_count(), len(stats))
+    for workers in range(2, limit + 1):
+        candidates.append(ExecutionPlan(
+            MODE_PROCESS, workers, 1,
+            calibration['process_startup'] + max(largest, total / _process_parallelism(workers))))
+        candidates.append(ExecutionPlan(
+            MODE_THREAD, workers, 1,
+            calibration['thread_startup'] * workers
+            + max(largest, total / _thread_parallelism(workers, calibration))))
+
+    return _best(candidates)
@@ -0,0 +1,33 @@
+import os
+import sys
+import zipfile
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import parallel_plan  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def calibration_cache(tmp_path, monkeypatch):
+    """校准缓存指向临时目录，避免读写用户目录下的真实缓存"""
+    path = str(tmp_path / 'calibration.json')
+    monkeypatch.setattr(parallel_plan, 'DEFAULT_CACHE_PATH', path)
+    monkeypatch.setattr(parallel_plan, '_calibration_memo', {})
+    return path
+
+
+@pytest.fixture
+def rewrite_sheet_xml():
+    """替换压缩包中第一个工作表的XML内容（模拟手工编辑过的工作表）"""
+    def rewrite(path, replace):
+        with zipfile.ZipFile(path) as src:
+            items = [(info, src.read(info.filename)) for info in src.infolist()]
+        with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as dst:
+            for info, data in items:
+                if info.filename == 'xl/worksheets/sheet1.xml':
+                    data = replace(data)
+                dst.writestr(info, data)
+    return rewrite
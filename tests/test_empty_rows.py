@@ -0,0 +1,65 @@
+import importlib
+
+import openpyxl
+import pytest
+
+import parallel_plan
+
+# 按真实模块名导入（conftest已把仓库根目录加入sys.path），spawn子进程才能反序列化工作函数
+xlrt_multi = importlib.import_module('xlrt多线程')
+
+
+@pytest.fixture
+def tail_workbook(tmp_path, rewrite_sheet_xml):
+    """dimension为A1:C15，最后一个<row>是第10行，第4行为空"""
+    path = str(tmp_path / 'tail.xlsx')
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.title = 'Sheet'
+    for r in range(1, 11):
+        if r == 4:
+            continue
+        for c in range(1, 4):
+            sheet.cell(row=r, column=c, value=r * c)
+    workbook.save(path)
+    rewrite_sheet_xml(path, lambda data: data.replace(b'ref="A1:C10"', b'ref="A1:C15"'))
+    return path
+
+
+def test_trailing_rows_after_last_row_element_are_empty(tail_workbook):
+    report = xlrt_multi.check_empty_rows_parallel(tail_workbook, chunk_size=5, max_workers=1)
+
+    assert report == {'Sheet': [4, 11, 12, 13, 14, 15]}
+
+
+def test_process_pool_path(tail_workbook, monkeypatch, capsys):
+    # 模拟多核机器：固定chunk_size时按CPU数启动spawn进程池
+    monkeypatch.setattr(parallel_plan.multiprocessing, 'cpu_count', lambda: 4)
+
+    report = xlrt_multi.check_empty_rows_parallel(tail_workbook, chunk_size=5)
+
+    assert '执行方式: process, 并发数: 3' in capsys.readouterr().out
+    assert report == {'Sheet': [4, 11, 12, 13, 14, 15]}
+
+
+def test_trailing_rows_in_auto_mode(tail_workbook):
+    report = xlrt_multi.check_empty_rows_parallel(tail_workbook)
+
+    assert report == {'Sheet': [4, 11, 12, 13, 14, 15]}
+
+
+def test_chunk_entirely_in_tail_reports_all_rows(tail_workbook):
+    result = xlrt_multi.check_chunk_for_empty_rows((tail_workbook, 'Sheet', 11, 15))
+
+    assert result == [11, 12, 13, 14, 15]
+
+
+def test_unreadable_stats_fall_back_to_serial(tail_workbook, monkeypatch, capsys):
+    def broken(file_path):
+        raise KeyError("There is no item named 'xl/_rels/workbook.xml.rels' in the archive")
+    monkeypatch.setattr(xlrt_multi, 'read_sheet_stats', broken)
+
+    report = xlrt_multi.check_empty_rows_parallel(tail_workbook)
+
+    assert '执行方式: serial, 并发数: 1, 每块行数: 15' in capsys.readouterr().out
+    assert report == {'Sheet': [4, 11, 12, 13, 14, 15]}
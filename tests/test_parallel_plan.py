@@ -0,0 +1,115 @@
+import json
+import multiprocessing
+import re
+
+import openpyxl
+import pytest
+
+import parallel_plan
+from parallel_plan import (
+    DEFAULT_CALIBRATION, MODE_PROCESS, MODE_SERIAL,
+    load_calibration, plan_row_chunks, plan_sheet_scan, read_sheet_stats
+)
+
+# 固定的校准结果，使规划结果与运行机器无关
+CALIBRATION = {
+    'process_startup': 0.2,
+    'thread_startup': 0.0002,
+    'open_overhead': 0.005,
+    'per_byte': 2e-7,
+    'per_cell': 1e-6,
+    'thread_speedup': 1.0,
+}
+
+
+def _stat(xml_bytes, rows, cols, name='Sheet'):
+    return {'name': name, 'xml_bytes': xml_bytes, 'shared_bytes': 0, 'rows': rows, 'cols': cols}
+
+
+def _cpus(monkeypatch, count):
+    monkeypatch.setattr(parallel_plan.multiprocessing, 'cpu_count', lambda: count)
+
+
+@pytest.fixture
+def workbook_path(tmp_path):
+    path = str(tmp_path / 'book.xlsx')
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.title = '数据'
+    for r in range(2, 8):
+        for c in range(2, 5):
+            sheet.cell(row=r, column=c, value=r * c)
+    workbook.create_sheet('空表')
+    workbook.save(path)
+    return path
+
+
+def test_read_sheet_stats(workbook_path):
+    stats = read_sheet_stats(workbook_path)
+
+    assert [stat['name'] for stat in stats] == ['数据', '空表']
+    assert (stats[0]['rows'], stats[0]['cols']) == (6, 3)
+    assert stats[0]['xml_bytes'] > stats[1]['xml_bytes'] > 0
+
+
+def test_read_sheet_stats_without_dimension(workbook_path, rewrite_sheet_xml):
+    rewrite_sheet_xml(workbook_path, lambda data: re.sub(rb'<dimension[^>]*/>', b'', data))
+
+    stat = read_sheet_stats(workbook_path)[0]
+
+    assert (stat['rows'], stat['cols']) == (0, 0)
+    assert stat['xml_bytes'] > 0
+
+
+def test_tiny_input_runs_serially(monkeypatch):
+    _cpus(monkeypatch, 8)
+    tiny = _stat(2000, 15, 5)
+
+    assert plan_row_chunks(tiny, CALIBRATION).mode == MODE_SERIAL
+    assert plan_sheet_scan([tiny, tiny], CALIBRATION).mode == MODE_SERIAL
+
+
+def test_large_sheets_use_processes(monkeypatch):
+    _cpus(monkeypatch, 4)
+    # 每个工作表约2秒，远大于进程启动的0.2秒
+    large = _stat(5_000_000, 100_000, 10)
+
+    plan = plan_sheet_scan([large] * 4, CALIBRATION)
+
+    assert plan.mode == MODE_PROCESS
+    assert plan.workers == 4
+    # 进程启动 + 4个工作表平均分到4个进程
+    per_sheet = sum(parallel_plan._costs(large, CALIBRATION))
+    assert plan.estimated_seconds == pytest.approx(0.2 + per_sheet)
+
+
+def test_row_chunks_use_processes_when_check_dominates(monkeypatch):
+    _cpus(monkeypatch, 4)
+    wide = _stat(1_000_000, 100_000, 50)
+
+    plan = plan_row_chunks(wide, CALIBRATION)
+
+    assert plan.mode == MODE_PROCESS
+    assert plan.workers == 4
+    assert plan.chunk_size == 25_000
+
+
+def test_workers_clamped_to_cpus(monkeypatch):
+    _cpus(monkeypatch, 1)
+    large = _stat(5_000_000, 100_000, 10)
+
+    assert plan_sheet_scan([large] * 4, CALIBRATION, max_workers=4).mode == MODE_SERIAL
+    assert plan_row_chunks(_stat(1_000_000, 100_000, 50), CALIBRATION, max_workers=4).mode == MODE_SERIAL
+
+
+def test_load_calibration_defaults_without_cache():
+    assert load_calibration('scanner') == DEFAULT_CALIBRATION
+
+
+def test_load_calibration_is_per_scanner(calibration_cache):
+    ctx = multiprocessing.get_context()
+    with open(calibration_cache, 'w', encoding='utf-8') as f:
+        json.dump({parallel_plan._calibration_key('a', ctx): CALIBRATION}, f)
+
+    assert load_calibration('a') == CALIBRATION
+    assert load_calibration('b') == DEFAULT_CALIBRATION
@@ -1,9 +1,49 @@
 import openpyxl
 import os
+import sys
+import math
 import time
 import multiprocessing
 import traceback
+from concurrent.futures import ThreadPoolExecutor
 from openpyxl.utils.cell import coordinate_from_string, column_index_from_string
+from parallel_plan import (
+    ExecutionPlan, MODE_SERIAL, MODE_THREAD, MODE_PROCESS,
+    calibrate, load_calibration, read_sheet_stats, plan_row_chunks
+)
+
+# 校准缓存中区分扫描器的名称
+SCANNER_NAME = 'xlrt多线程.check_empty_rows_parallel'
+
+def is_row_empty(values):
+    """判空逻辑：整行均为None或空白字符串"""
+    for value in values:
+        if value is not None:
+            if isinstance(value, str) and value.strip() == "":
+                continue
+            return False
+    return True
+
+def measure_chunk_scan(file_path):
+    """
+    校准用：按分块扫描的方式读取样例工作簿
+    返回 (打开耗时, 解析耗时, 判空耗时)，判空在已读入内存的行上计时，不含解析
+    """
+    t0 = time.perf_counter()
+    workbook = openpyxl.load_workbook(file_path, read_only=True)
+    sheet = workbook.active
+    t1 = time.perf_counter()
+    rows = list(sheet.iter_rows(values_only=True))
+    t2 = time.perf_counter()
+    workbook.close()
+    
+    check_times = []
+    for _ in range(3):
+        t3 = time.perf_counter()
+        for values in rows:
+            is_row_empty(values)
+        check_times.append(time.perf_counter() - t3)
+    return t1 - t0, t2 - t1, min(check_times)
 
 def check_chunk_for_empty_rows(args):
     """
@@ -28,30 +68,30 @@ def check_chunk_for_empty_rows(args):
         start_col_idx = column_index_from_string(start_col)
         end_col_idx = column_index_from_string(end_col)
         
-        # 只检查指定的行范围
-        for row_idx in range(start_row, end_row + 1):
-            is_row_empty = True
-            for col_idx in range(start_col_idx, end_col_idx + 1):
-                cell = sheet.cell(row=row_idx, column=col_idx)
-                # 判空逻辑
-                if cell.value is not None:
-                    if isinstance(cell.value, str) and cell.value.strip() == "":
-                        continue
-                    is_row_empty = False
-                    break
-            
-            if is_row_empty:
+        # 只检查指定的行范围（只读模式下sheet.cell()每次都会从头解析XML，改为按行流式读取）
+        rows = sheet.iter_rows(min_row=start_row, max_row=end_row,
+                               min_col=start_col_idx, max_col=end_col_idx,
+                               values_only=True)
+        last_row = start_row - 1
+        for row_idx, values in enumerate(rows, start=start_row):
+            last_row = row_idx
+            if is_row_empty(values):
                 empty_rows.append(row_idx)
         
+        # 数据范围内、最后一个<row>之后的行不会被iter_rows返回，均为空行
+        empty_rows.extend(range(last_row + 1, end_row + 1))
+        
         workbook.close()
     except Exception as e:
         print(f"处理工作表 '{sheet_name}' 行 {start_row}-{end_row} 时出错: {str(e)}")
         traceback.print_exc()
     return empty_rows
 
-def check_empty_rows_parallel(file_path, chunk_size=500):
+def check_empty_rows_parallel(file_path, chunk_size=None, max_workers=None):
     """
-    使用多进程并行检测空行（修复Windows启动问题）
+    并行检测空行（修复Windows启动问题）
+    chunk_size 为 None 时按本机校准结果和工作表规模自动选择串行/多线程/多进程、
+    并发数和分块大小；指定 chunk_size 时按该大小分块并使用多进程
     """
     empty_rows_report = {}
     
@@ -69,6 +109,16 @@ def check_empty_rows_parallel(file_path, chunk_size=500):
         # 获取Windows兼容的上下文
         ctx = multiprocessing.get_context('spawn')
         
+        # 自动模式下读取工作表XML大小与本机校准结果，用于选择执行方式
+        sheet_stats = None
+        if chunk_size is None:
+            calibration = load_calibration(SCANNER_NAME, ctx)
+            try:
+                sheet_stats = {stat['name']: stat for stat in read_sheet_stats(file_path)}
+            except Exception as e:
+                # 规模信息只用于估算，读取失败时改为串行扫描，不影响检查本身
+                print(f"读取工作表规模信息失败，改为串行扫描: {str(e)}")
+        
         for sheet_name in sheet_names:
             print(f"\n处理工作表: '{sheet_name}'")
             
@@ -88,19 +138,40 @@ def check_empty_rows_parallel(file_path, chunk_size=500):
                 start_row = int(start_row_ref)
                 end_row = int(end_row_ref)
                 total_rows = end_row - start_row + 1
+                total_cols = column_index_from_string(end_col) - column_index_from_string(start_col) + 1
                 workbook_temp.close()
                 
+                # 选择执行方式、并发数和分块大小
+                if chunk_size is None and sheet_stats is None:
+                    plan = ExecutionPlan(MODE_SERIAL, 1, total_rows, None)
+                elif chunk_size is None:
+                    stat = dict(sheet_stats.get(sheet_name, {'xml_bytes': 0, 'shared_bytes': 0}),
+                                rows=total_rows, cols=total_cols)
+                    plan = plan_row_chunks(stat, calibration, max_workers)
+                else:
+                    workers = min(max_workers or multiprocessing.cpu_count(),
+                                  math.ceil(total_rows / chunk_size))
+                    plan = ExecutionPlan(MODE_PROCESS if workers > 1 else MODE_SERIAL,
+                                         workers, chunk_size, None)
+                print(f"  执行方式: {plan.mode}, 并发数: {plan.workers}, 每块行数: {plan.chunk_size}")
+                
                 # 准备分块处理（确保不重叠）
                 chunks = []
                 current = start_row
                 while current <= end_row:
-                    chunk_end = min(current + chunk_size - 1, end_row)
+                    chunk_end = min(current + plan.chunk_size - 1, end_row)
                     chunks.append((file_path, sheet_name, current, chunk_end))
                     current = chunk_end + 1  # 确保下一块不重叠
                 
-                # 使用进程池并行处理（使用spawn上下文）
-                with ctx.Pool(processes=multiprocessing.cpu_count()) as pool:
-                    results = pool.map(check_chunk_for_empty_rows, chunks)
+                if plan.mode == MODE_SERIAL:
+                    results = [check_chunk_for_empty_rows(chunk) for chunk in chunks]
+                elif plan.mode == MODE_THREAD:
+                    with ThreadPoolExecutor(max_workers=plan.workers) as executor:
+                        results = list(executor.map(check_chunk_for_empty_rows, chunks))
+                else:
+                    # 使用进程池并行处理（使用spawn上下文）
+                    with ctx.Pool(processes=plan.workers) as pool:
+                        results = pool.map(check_chunk_for_empty_rows, chunks)
                 
                 # 合并结果并去重
                 empty_rows = []
@@ -130,8 +201,8 @@ def main():
     start_time = time.time()
     file_path = r'C:\Users\wjy17\Desktop\Excel_Scripts\#竞技场神兽配置表战力.xlsx'  # 修改为实际路径
     
-    # 使用多进程检查空行（每500行一个块）
-    empty_report = check_empty_rows_parallel(file_path, chunk_size=500)
+    # 检查空行（按本机校准结果自动选择串行/多线程/多进程及分块大小）
+    empty_report = check_empty_rows_parallel(file_path)
     
     # 输出异常结果
     if empty_report:
@@ -162,4 +233,8 @@ if __name__ == "__main__":
     # Windows系统必需设置
     multiprocessing.freeze_support()
     multiprocessing.set_start_method('spawn', force=True)
-    main()
\ No newline at end of file
+    if '--calibrate' in sys.argv:
+        # 显式校准：测量本机进程启动和单元格扫描耗时，结果缓存供自动模式使用
+        print(calibrate(SCANNER_NAME, measure_chunk_scan, multiprocessing.get_context('spawn')))
+    else:
+        main()
\ No newline at end of file